@@ -139,6 +139,8 @@ class HybridDispatchBuilderSolver:
             solver_results = self.glpk_solve()
         elif self.options.solver == "cbc":
             solver_results = self.cbc_solve()
+        elif self.options.solver == "highs":
+            solver_results = self.highs_solve()
         elif self.options.solver == "xpress":
             solver_results = self.xpress_solve()
         elif self.options.solver == "xpress_persistent":
@@ -303,6 +305,33 @@ class HybridDispatchBuilderSolver:
             self.pyomo_model, self.options.log_name, self.options.solver_options
         )
 
+    @staticmethod
+    def highs_solve_call(
+        pyomo_model: pyomo.ConcreteModel,
+        log_name: str = "",
+        user_solver_options: dict = None,
+    ):
+        # Ref. on solver options: https://ergo-code.github.io/HiGHS/dev/options/definitions/
+        highs_solver_options = {"mip_rel_gap": 0.001, "time_limit": 30}
+        solver_options = SolverOptions(
+            highs_solver_options, log_name, user_solver_options, "log_file"
+        )
+
+        solver = pyomo.SolverFactory("appsi_highs")
+        results = solver.solve(pyomo_model, options=solver_options.constructed)
+        HybridDispatchBuilderSolver.log_and_solution_check(
+            log_name,
+            solver_options.instance_log,
+            results.solver.termination_condition,
+            pyomo_model,
+        )
+        return results
+
+    def highs_solve(self):
+        return HybridDispatchBuilderSolver.highs_solve_call(
+            self.pyomo_model, self.options.log_name, self.options.solver_options
+        )
+
     @staticmethod
     def xpress_solve_call(
         pyomo_model: pyomo.ConcreteModel,
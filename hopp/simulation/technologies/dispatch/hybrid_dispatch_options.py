@@ -17,7 +17,7 @@ class HybridDispatchOptions:
     Args:
         dispatch_options (dict): Contains attribute key-value pairs to change default options.
 
-            - **solver** (str, default='cbc'): MILP solver used for dispatch optimization problem. Options are `('glpk', 'cbc', 'xpress', 'xpress_persistent', 'gurobi_ampl', 'gurobi')`.
+            - **solver** (str, default='cbc'): MILP solver used for dispatch optimization problem. Options are `('glpk', 'cbc', 'highs', 'xpress', 'xpress_persistent', 'gurobi_ampl', 'gurobi')`.
 
             - **solver_options** (dict): Dispatch solver options.
 
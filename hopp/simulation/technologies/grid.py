@@ -127,30 +127,29 @@ class Grid(PowerSource):
                 lifetime_schedule: NDArrayFloat = np.tile([self.interconnect_kw],
                     len(total_gen))
                 desired_schedule = np.tile(
-                    [x * 1e3 for x in self.site.desired_schedule],
+                    np.asarray(self.site.desired_schedule) * 1e3,
                     int(project_life / (len(self.site.desired_schedule) // self.site.n_timesteps))
                 )
             elif self.site.curtailment_value_type == "desired_schedule":
-                lifetime_schedule: NDArrayFloat = np.tile([
-                    x * 1e3 for x in self.site.desired_schedule],
+                lifetime_schedule: NDArrayFloat = np.tile(
+                    np.asarray(self.site.desired_schedule) * 1e3,
                     int(project_life / (len(self.site.desired_schedule) // self.site.n_timesteps))
                 )
                 desired_schedule = lifetime_schedule
 
+            total_gen = np.asarray(total_gen)
+
             # Generate the final generation profile by curtailing over-generation
-            self.generation_profile = np.minimum(total_gen, lifetime_schedule)
+            generation_profile = np.minimum(total_gen, lifetime_schedule)
+            self.generation_profile = generation_profile
 
             # Calculate missed load and missed load percentage
-            self.missed_load = np.array([
-                max(schedule - gen, 0) 
-                for schedule, gen in zip(desired_schedule, self.generation_profile)
-            ])
-            self.missed_load_percentage = (sum(self.missed_load)/sum(desired_schedule)) * 100
+            self.missed_load = np.maximum(desired_schedule - generation_profile, 0.)
+            self.missed_load_percentage = (np.sum(self.missed_load)/np.sum(desired_schedule)) * 100
 
             # Calculate curtailed schedule and curtailed schedule percentage
-            self.schedule_curtailed = np.array([gen - schedule if gen > schedule else 0. for (gen, schedule) in
-                                            zip(total_gen, lifetime_schedule)])
-            self.schedule_curtailed_percentage = (sum(self.schedule_curtailed)/sum(lifetime_schedule)) * 100
+            self.schedule_curtailed = np.maximum(total_gen - lifetime_schedule, 0.)
+            self.schedule_curtailed_percentage = (np.sum(self.schedule_curtailed)/np.sum(lifetime_schedule)) * 100
 
             # NOTE: This is currently only happening for load following, would be good to make it more general
             #           i.e. so that this analysis can be used when load following isn't being used (without storage)
@@ -159,15 +158,14 @@ class Grid(PowerSource):
             N_hybrid = len(self.generation_profile)
 
             final_power_production = total_gen
-            schedule = [x for x in desired_schedule]
-            hybrid_power = [(final_power_production[x] - (schedule[x]*0.95)) for x in range(len(final_power_production))]
+            schedule = desired_schedule
+            hybrid_power = final_power_production - (schedule * 0.95)
 
             # Count the instances where load is met
-            load_met = len([i for i in hybrid_power if i  >= 0])
+            load_met = np.count_nonzero(hybrid_power >= 0)
             self.time_load_met = 100 * load_met/N_hybrid
 
-            final_power_array = np.array(final_power_production)
-            power_met = np.where(final_power_array > schedule, schedule, final_power_array)
+            power_met = np.where(final_power_production > schedule, schedule, final_power_production)
             self.capacity_factor_load = np.sum(power_met) / np.sum(schedule) * 100
             
             logger.info('Percent of time firm power requirement is met: %s', np.round(self.time_load_met,2))
@@ -134,6 +134,7 @@ class WindPlant(PowerSource):
         init=False, default="WindPowerSingleOwner"
     )  # config_name will always be WindPowerSingleOwner?
     _rating_range_kw: Tuple[int, int] = field(init=False)
+    _turb_rating_cache: Optional[float] = field(init=False, default=None)
 
     def __attrs_post_init__(self):
         """
@@ -240,6 +241,7 @@ class WindPlant(PowerSource):
                 turbine_name = self.config.turbine_name
             turbine_dict = turb_lib_interface.get_pysam_turbine_specs(turbine_name,self)
             self._system_model.Turbine.assign(turbine_dict)
+            self._turb_rating_cache = None
             self.rotor_diameter = turbine_dict["wind_turbine_rotor_diameter"]
             self.turb_rating = np.round(max(turbine_dict["wind_turbine_powercurve_powerout"]), decimals = 3)
 
@@ -286,6 +288,12 @@ class WindPlant(PowerSource):
             air_dens_losses = calculate_air_density_losses(self.site.elev)
             self._system_model.Losses.assign({"turb_specific_loss":air_dens_losses})
 
+    def value(self, var_name: str, var_value=None):
+        if var_value is not None:
+            # the powercurve may be set through here, so drop the cached turbine rating
+            self._turb_rating_cache = None
+        return super().value(var_name, var_value)
+
     @property
     def wake_model(self) -> str:
         try:
@@ -313,7 +321,8 @@ class WindPlant(PowerSource):
 
     @property
     def num_turbines(self):
-        return len(self._system_model.value("wind_farm_xCoordinates"))
+        # the layout keeps its own copy of the turbine positions in sync with the system model
+        return len(self._layout.turb_pos_x)
 
     @num_turbines.setter
     def num_turbines(self, n_turbines: int):
@@ -322,8 +331,8 @@ class WindPlant(PowerSource):
             if n_turbines == len(self._layout.parameters.layout_x):
                 self._layout.set_num_turbines(n_turbines)
             else:
-                if n_turbines != len(self._system_model.value("wind_farm_xCoordinates")):
-                    n_turbs_layout = len(self._system_model.value("wind_farm_xCoordinates"))
+                n_turbs_layout = self.num_turbines
+                if n_turbines != n_turbs_layout:
                     msg = (
                         f"Using custom wind farm layout and input number of turbines ({n_turbines}) "
                         f"does not equal length of layout ({n_turbs_layout}). "
@@ -341,7 +350,7 @@ class WindPlant(PowerSource):
     def rotor_diameter(self, d):
         self._system_model.value("wind_turbine_rotor_diameter", d)
         # recalculate layout spacing in case min spacing is violated
-        self.num_turbines = self.num_turbines
+        self._layout.set_num_turbines(self.num_turbines)
 
     @property
     def turb_rating(self):
@@ -349,7 +358,11 @@ class WindPlant(PowerSource):
 
         :return: kw rating of turbine
         """
-        return max(self._system_model.value("wind_turbine_powercurve_powerout"))
+        if self._turb_rating_cache is None:
+            self._turb_rating_cache = float(
+                np.max(self._system_model.value("wind_turbine_powercurve_powerout"))
+            )
+        return self._turb_rating_cache
 
     @turb_rating.setter
     def turb_rating(self, rating_kw):
@@ -359,14 +372,17 @@ class WindPlant(PowerSource):
 
         :param rating_kw: float
         """
-        scaling = rating_kw / self.turb_rating
-        self._system_model.value(
-            "wind_turbine_powercurve_powerout",
-            [i * scaling for i in self._system_model.value("wind_turbine_powercurve_powerout")],
+        powercurve = np.asarray(
+            self._system_model.value("wind_turbine_powercurve_powerout"), dtype=np.float64
         )
+        peak_power = powercurve.max()
+        scaling = rating_kw / peak_power
+        powercurve *= scaling
+        self._system_model.value("wind_turbine_powercurve_powerout", powercurve.tolist())
+        self._turb_rating_cache = float(peak_power * scaling)
         self._system_model.value(
             "system_capacity",
-            self.turb_rating * len(self._system_model.value("wind_farm_xCoordinates")),
+            self._turb_rating_cache * self.num_turbines,
         )
 
     def modify_powercurve(self, rotor_diam, rating_kw):
@@ -405,6 +421,7 @@ class WindPlant(PowerSource):
                 ", rating={}. Check diameter or turn off 'recalculate_powercurve'".
                 format(rotor_diam, rating_kw)
             )
+        self._turb_rating_cache = None
         self._system_model.value("wind_turbine_rotor_diameter", rotor_diam)
         self._system_model.value("system_capacity", rating_kw * self.num_turbines)
         logger.info("WindPlant set system_capacity to {} kW".format(self.system_capacity_kw))
@@ -421,6 +438,7 @@ class WindPlant(PowerSource):
             self._system_model.value("wind_farm_xCoordinates", xcoords)
             self._system_model.value("wind_farm_yCoordinates", ycoords)
             self._system_model.value("system_capacity", self.turb_rating * len(xcoords))
+        self._layout.turb_pos_x, self._layout.turb_pos_y = xcoords, ycoords
         logger.debug("WindPlant set xcoords to {}".format(xcoords))
         logger.debug("WindPlant set ycoords to {}".format(ycoords))
         logger.info("WindPlant set system_capacity to {} kW".format(self.system_capacity_kw))
@@ -193,3 +193,39 @@ def test_batterystateless_cycle_limits():
 
     assert battery_sl.outputs.lifecycles_per_day[0:2] == pytest.approx([0.75048, 1], rel=1e-3)
 
+
+
+def test_battery_dispatch_highs():
+    expected_objective = 28957.15
+
+    technologies = technologies_input.copy()
+    technologies['battery']['tracking'] = True
+    model = pyomo.ConcreteModel(name='battery_only')
+    model.forecast_horizon = pyomo.Set(initialize=range(dispatch_n_look_ahead))
+    model.price = pyomo.Param(model.forecast_horizon,
+                              within=pyomo.Reals,
+                              initialize=prices,
+                              mutable=True,
+                              units=u.USD / u.MWh)
+
+    config = BatteryConfig.from_dict(technologies['battery'])
+    battery = Battery(site, config=config)
+    battery._dispatch = SimpleBatteryDispatch(model,
+                                              model.forecast_horizon,
+                                              battery._system_model,
+                                              battery._financial_model,
+                                              'battery',
+                                              HybridDispatchOptions({'solver': 'highs'}))
+
+    model.test_objective = pyomo.Objective(
+        rule=create_test_objective_rule,
+        sense=pyomo.maximize)
+
+    battery.dispatch.initialize_parameters()
+    battery.dispatch.update_time_series_parameters(0)
+    battery.dispatch.update_dispatch_initial_soc(battery.dispatch.minimum_soc)   # Set initial SOC to minimum
+    assert_units_consistent(model)
+    results = HybridDispatchBuilderSolver.highs_solve_call(model)
+
+    assert results.solver.termination_condition == TerminationCondition.optimal
+    assert pyomo.value(model.test_objective) == pytest.approx(expected_objective, 1e-3)
@@ -137,6 +137,18 @@ def test_changing_system_capacity_pysam(site):
         assert model.system_capacity_kw == approx(n)
 
 
+def test_modify_coordinates_pysam(site):
+    config = WindConfig.from_dict({'num_turbines': 10, "turbine_rating_kw": 2000})
+    model = WindPlant(site, config=config)
+    xcoords = [0., 500., 1000.]
+    ycoords = [0., 0., 500.]
+    model.modify_coordinates(xcoords, ycoords)
+    assert model.num_turbines == 3
+    assert list(model._system_model.value("wind_farm_xCoordinates")) == xcoords
+    assert list(model._system_model.value("wind_farm_yCoordinates")) == ycoords
+    assert model.system_capacity_kw == 6000
+
+
 #################### FLORIS tests ################
 def test_floris_num_turbines(site):
     floris_config_path = (